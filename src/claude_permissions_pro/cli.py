@@ -74,18 +74,26 @@ def cmd_hook(args):
     run_hook(config_path)
 
 
-def cmd_test(args):
-    """Test a command against config."""
+def _load_config(config_path: Path):
+    """Load a config file for a CLI command, exiting with an error if it is missing or invalid."""
     from .hook import Config
-    from .matcher import Matcher
-    from .shell_parser import parse_command
 
-    config_path = Path(args.config)
     if not config_path.exists():
         print(f"Error: Config file not found: {config_path}", file=sys.stderr)
         sys.exit(1)
+    try:
+        return Config.load(config_path)
+    except ValueError as e:
+        print(f"Error: Invalid config: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+def cmd_test(args):
+    """Test a command against config."""
+    from .matcher import Decision, Matcher
+    from .shell_parser import parse_command
 
-    config = Config.load(config_path)
+    config = _load_config(Path(args.config))
     matcher = Matcher(
         allow_patterns=config.allow_patterns,
         deny_patterns=config.deny_patterns,
@@ -109,7 +117,7 @@ def cmd_test(args):
     if result.matched_rule:
         print(f"Matched rule: {result.matched_rule}")
 
-    if result.decision.value == "ask" and config.judge and config.judge.enabled:
+    if result.decision is Decision.ASK and config.judge and config.judge.enabled:
         print(f"\nJudge: would be triggered (model={config.judge.model})")
 
 
@@ -135,16 +143,10 @@ def cmd_init(args):
 def cmd_confusion_matrix(args):
     """Run confusion matrix analysis against history and/or decision log."""
     from .confusion_matrix import analyze_from_history, analyze_from_log
-    from .hook import Config
     from .logger import DEFAULT_LOG_FILE
     from .matcher import Matcher
 
-    config_path = Path(args.config)
-    if not config_path.exists():
-        print(f"Error: Config file not found: {config_path}", file=sys.stderr)
-        sys.exit(1)
-
-    config = Config.load(config_path)
+    config = _load_config(Path(args.config))
     matcher = Matcher(
         allow_patterns=config.allow_patterns,
         deny_patterns=config.deny_patterns,
@@ -173,13 +175,17 @@ def cmd_generate_tests(args):
     from .generate_tests import extract_all_commands, generate_test_file
 
     print("Extracting commands from Claude Code history...")
-    commands = extract_all_commands(max_sessions=args.max_sessions)
-    print(f"Found {len(commands)} unique commands")
+    by_base = extract_all_commands(max_sessions=args.max_sessions)
+    print(f"Found {sum(map(len, by_base.values()))} unique commands")
 
     output_path = Path(args.output)
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    count = generate_test_file(commands, output_path, config_path=args.config)
+    try:
+        count = generate_test_file(by_base, output_path, config_path=args.config)
+    except ValueError as e:
+        print(f"Error: Invalid config: {e}", file=sys.stderr)
+        sys.exit(1)
     print(f"Generated {count} test cases in {output_path}")
     print()
     print("Run tests with:")
@@ -24,11 +24,7 @@ from collections import Counter
 from dataclasses import dataclass, field
 from pathlib import Path
 
-from .history import (
-    find_session_dirs,
-    iter_session_files,
-    extract_commands_from_session,
-)
+from .history import iter_commands_prefetched, list_session_files
 from .logger import iter_decisions, DecisionRecord
 from .matcher import Matcher, Decision
 
@@ -132,42 +128,34 @@ def analyze_from_history(
     result = ConfusionResult()
     seen_commands: set[str] = set()
 
-    session_dirs = find_session_dirs()
-    sessions_analyzed = 0
+    session_files = list_session_files(max_sessions)
 
-    for session_dir in session_dirs:
-        for session_file in iter_session_files(session_dir):
-            if max_sessions and sessions_analyzed >= max_sessions:
-                break
-
-            for record in extract_commands_from_session(session_file):
-                result.total_commands += 1
-                cmd = record.command
-
-                # Deduplicate for unique count
-                if cmd in seen_commands:
-                    continue
-                seen_commands.add(cmd)
-                result.unique_commands += 1
+    for record in iter_commands_prefetched(session_files):
+        result.total_commands += 1
+        cmd = record.command
 
-                # What would the matcher decide?
-                match_result = matcher.check(cmd)
+        # Deduplicate for unique count
+        if cmd in seen_commands:
+            continue
+        seen_commands.add(cmd)
+        result.unique_commands += 1
 
-                if match_result.decision == Decision.ALLOW:
-                    result.true_positives += 1
-                    if len(result.tp_samples) < 20:
-                        result.tp_samples.append(cmd)
-                else:
-                    # ASK or DENY — user approved it but config wouldn't auto-approve
-                    result.false_negatives += 1
-                    if len(result.fn_samples) < 50:
-                        result.fn_samples.append(cmd)
+        # What would the matcher decide?
+        match_result = matcher.check(cmd)
 
-                    # Track base command for FN breakdown
-                    base = cmd.split()[0] if cmd.split() else cmd
-                    result.fn_by_command[base] += 1
+        if match_result.decision is Decision.ALLOW:
+            result.true_positives += 1
+            if len(result.tp_samples) < 20:
+                result.tp_samples.append(cmd)
+        else:
+            # ASK or DENY — user approved it but config wouldn't auto-approve
+            result.false_negatives += 1
+            if len(result.fn_samples) < 50:
+                result.fn_samples.append(cmd)
 
-            sessions_analyzed += 1
+            # Track base command for FN breakdown
+            base = cmd.split()[0] if cmd.split() else cmd
+            result.fn_by_command[base] += 1
 
     return result
 
@@ -205,7 +193,7 @@ def analyze_from_log(
         # config when available, otherwise fall back to the stored decision.
         if matcher is not None:
             current = matcher.check(record.command)
-            is_allow = current.decision == Decision.ALLOW
+            is_allow = current.decision is Decision.ALLOW
         else:
             is_allow = record.final_decision == "allow"
 
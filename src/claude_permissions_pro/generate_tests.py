@@ -11,45 +11,118 @@ import re
 from collections import Counter
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterator
+from typing import Callable, Iterator
 
 from .history import (
-    find_session_dirs,
-    iter_session_files,
     extract_commands_from_session,
+    list_session_files,
+    map_sessions,
 )
 from .hook import Config
 from .matcher import Matcher, Decision
-from .shell_parser import parse_command, extract_base_command
+from .shell_parser import extract_base_command, parse_command
 
 
-def extract_all_commands(max_sessions: int | None = None) -> list[str]:
-    """Extract all unique bash commands from history."""
-    commands = set()
-    sessions_processed = 0
+_HEADER_TEMPLATE = '''"""
+Auto-generated tests from Claude Code session history.
 
-    for session_dir in find_session_dirs():
-        for session_file in iter_session_files(session_dir):
-            if max_sessions and sessions_processed >= max_sessions:
-                break
+These are commands you have previously approved.
+The permission system should allow all of them.
+"""
+
+import pytest
+from pathlib import Path
+from claude_permissions_pro.hook import Config
+from claude_permissions_pro.matcher import Matcher, Decision
+
+
+CONFIG_PATH = Path("{config_path}").expanduser()
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    """Load matcher from config."""
+    if not CONFIG_PATH.exists():
+        pytest.skip(f"Config not found: {{CONFIG_PATH}}")
+    config = Config.load(CONFIG_PATH)
+    return Matcher(
+        allow_patterns=config.allow_patterns,
+        deny_patterns=config.deny_patterns,
+        mode=config.mode,
+    )
+
+
+'''
+
+# Runs of non-identifier characters (underscores included) collapse to one "_"
+_NON_IDENT_RUN_RE = re.compile(r'[^a-zA-Z0-9]+')
+
+# One generated test method; `expected` is a Decision member name.
+_TEST_TEMPLATE = (
+    '    def {name}(self, matcher):\n'
+    '        """Test: {doc}"""\n'
+    '        cmd = {cmd_literal}\n'
+    '        result = matcher.check(cmd)\n'
+    '        assert result.decision == Decision.{expected}, \\\n'
+    '            f"Expected {expected} for {{cmd!r}}, got {{result.decision}}: {{result.reason}}"\n'
+    '\n'
+)
+
+
+def extract_all_commands(max_sessions: int | None = None) -> dict[str, list[str]]:
+    """
+    Extract all unique bash commands from history, grouped by base command.
+
+    Each unique command is parsed once, as it is first seen. Commands within
+    a group are sorted.
+    """
+    seen: set[str] = set()
+    by_base: dict[str, list[str]] = {}
+
+    session_files = list_session_files(max_sessions)
 
-            for record in extract_commands_from_session(session_file):
-                if record.command:
-                    commands.add(record.command)
+    for session_commands in map_sessions(_session_commands, session_files):
+        for cmd in session_commands:
+            if cmd in seen:
+                continue
+            seen.add(cmd)
 
-            sessions_processed += 1
+            base = _first_base_command(cmd)
+            if base is not None:
+                by_base.setdefault(base, []).append(cmd)
 
-    return sorted(commands)
+    for cmds in by_base.values():
+        cmds.sort()
+    return by_base
+
+
+def _first_base_command(cmd: str) -> str | None:
+    """Base command of the first segment of `cmd`, or None if it has none."""
+    segments = parse_command(cmd).segments
+    return extract_base_command(segments[0].command) if segments else None
+
+
+def _session_commands(session_file: Path) -> list[str]:
+    """Per-session worker: unique non-empty commands, in first-seen order."""
+    return list(dict.fromkeys(
+        record.command
+        for record in extract_commands_from_session(session_file)
+        if record.command
+    ))
 
 
 def generate_test_file(
-    commands: list[str],
+    by_base: dict[str, list[str]],
     output_path: Path,
     config_path: str = "~/.config/claude-permissions-pro.toml"
 ) -> int:
     """
     Generate a pytest file that tests all commands.
 
+    Args:
+        by_base: Unique commands grouped by base command, as returned
+            by extract_all_commands()
+
     Returns number of test cases generated.
     """
     # Load config to pre-check commands and determine expected decisions
@@ -63,108 +136,84 @@ def generate_test_file(
             mode=config.mode,
         )
 
-    # Group commands by base command for organization
-    by_base: dict[str, list[str]] = {}
-    for cmd in commands:
-        parsed = parse_command(cmd)
-        if parsed.segments:
-            base = extract_base_command(parsed.segments[0].command)
-            by_base.setdefault(base, []).append(cmd)
-
-    lines = [
-        '"""',
-        'Auto-generated tests from Claude Code session history.',
-        '',
-        'These are commands you have previously approved.',
-        'The permission system should allow all of them.',
-        '"""',
-        '',
-        'import pytest',
-        'from pathlib import Path',
-        'from claude_permissions_pro.hook import Config',
-        'from claude_permissions_pro.matcher import Matcher, Decision',
-        '',
-        '',
-        f'CONFIG_PATH = Path("{config_path}").expanduser()',
-        '',
-        '',
-        '@pytest.fixture(scope="module")',
-        'def matcher():',
-        '    """Load matcher from config."""',
-        '    if not CONFIG_PATH.exists():',
-        '        pytest.skip(f"Config not found: {CONFIG_PATH}")',
-        '    config = Config.load(CONFIG_PATH)',
-        '    return Matcher(',
-        '        allow_patterns=config.allow_patterns,',
-        '        deny_patterns=config.deny_patterns,',
-        '        mode=config.mode,',
-        '    )',
-        '',
-        '',
-    ]
+    test_count = 0
+
+    with output_path.open("w", encoding="utf-8", buffering=1 << 20) as f:
+        write = f.write
+        write(_HEADER_TEMPLATE.format(config_path=config_path))
 
+        # Generate test class per base command
+        for base_cmd in sorted(by_base.keys()):
+            test_count += _emit_class(base_cmd, by_base[base_cmd], matcher, write)
+
+    return test_count
+
+
+def _emit_class(
+    base_cmd: str,
+    cmds: list[str],
+    matcher: Matcher | None,
+    write: Callable[[str], object]
+) -> int:
+    """
+    Write the test class for one base command.
+
+    Returns number of test cases written.
+    """
     test_count = 0
 
-    # Generate test class per base command
-    for base_cmd in sorted(by_base.keys()):
-        cmds = by_base[base_cmd]
-
-        # Sanitize class name
-        class_name = f"TestApproved_{_sanitize_name(base_cmd)}"
-
-        lines.append(f'class {class_name}:')
-        lines.append(f'    """Tests for {base_cmd} commands."""')
-        lines.append('')
-
-        for i, cmd in enumerate(cmds[:50]):  # Limit per base command
-            test_name = f"test_{_sanitize_name(base_cmd)}_{i}"
-            # Escape for Python string literal
-            escaped_cmd = (cmd
-                .replace('\\', '\\\\')
-                .replace('"', '\\"')
-                .replace('\n', '\\n')
-                .replace('\r', '\\r')
-                .replace('\t', '\\t'))
-
-            # Escape docstring (no backslashes that look like escapes)
-            doc_cmd = _truncate(cmd, 50).replace('\\', '/').replace('"', "'")
-
-            # Determine expected decision by actually running the matcher
-            if matcher:
-                check_result = matcher.check(cmd)
-                if check_result.decision == Decision.ALLOW:
-                    expected_decision = "Decision.ALLOW"
-                    expected_name = "ALLOW"
-                elif check_result.decision == Decision.DENY:
-                    # Skip denied commands — they shouldn't be in the test suite
-                    continue
-                else:
-                    expected_decision = "Decision.ASK"
-                    expected_name = "ASK"
-            else:
-                expected_decision = "Decision.ALLOW"
+    # Bind hot globals/attributes to locals for the per-test loop
+    dumps = json.dumps
+    truncate = _truncate
+    format_test = _TEST_TEMPLATE.format
+    check = matcher.check if matcher else None
+
+    # Sanitize once: class and test names share it
+    base_name = _sanitize_name(base_cmd)
+
+    write(f'class TestApproved_{base_name}:\n')
+    doc_base = dumps(base_cmd, ensure_ascii=False)[1:-1]
+    write(f'    """Tests for {doc_base} commands."""\n\n')
+
+    for i, cmd in enumerate(cmds[:50]):  # Limit per base command
+        test_name = f"test_{base_name}_{i}"
+        # A JSON string is also a valid Python string literal. Keep
+        # non-ASCII as-is: \u-escaped surrogate pairs would decode
+        # to a different string in Python.
+        cmd_literal = dumps(cmd, ensure_ascii=False)
+
+        # Same escaping for the docstring, minus the outer quotes
+        doc_cmd = dumps(truncate(cmd, 50), ensure_ascii=False)[1:-1]
+
+        # Determine expected decision by actually running the matcher
+        if check:
+            check_result = check(cmd)
+            if check_result.decision is Decision.ALLOW:
                 expected_name = "ALLOW"
+            elif check_result.decision is Decision.DENY:
+                # Skip denied commands — they shouldn't be in the test suite
+                continue
+            else:
+                expected_name = "ASK"
+        else:
+            expected_name = "ALLOW"
 
-            lines.append(f'    def {test_name}(self, matcher):')
-            lines.append(f'        """Test: {doc_cmd}"""')
-            lines.append(f'        cmd = "{escaped_cmd}"')
-            lines.append(f'        result = matcher.check(cmd)')
-            lines.append(f'        assert result.decision == {expected_decision}, \\')
-            lines.append(f'            f"Expected {expected_name} for {{cmd!r}}, got {{result.decision}}: {{result.reason}}"')
-            lines.append('')
-
-            test_count += 1
+        write(format_test(
+            name=test_name,
+            doc=doc_cmd,
+            cmd_literal=cmd_literal,
+            expected=expected_name,
+        ))
 
-        lines.append('')
+        test_count += 1
 
-    output_path.write_text('\n'.join(lines))
+    write('\n')
     return test_count
 
 
 def _sanitize_name(s: str) -> str:
     """Convert string to valid Python identifier."""
-    s = re.sub(r'[^a-zA-Z0-9]', '_', s)
-    s = re.sub(r'_+', '_', s)
+    s = _NON_IDENT_RUN_RE.sub('_', s)
     s = s.strip('_')
     if s and s[0].isdigit():
         s = '_' + s
@@ -190,11 +239,11 @@ def main():
     args = parser.parse_args()
 
     print("Extracting commands from Claude Code history...")
-    commands = extract_all_commands(max_sessions=args.max_sessions)
-    print(f"Found {len(commands)} unique commands")
+    by_base = extract_all_commands(max_sessions=args.max_sessions)
+    print(f"Found {sum(map(len, by_base.values()))} unique commands")
 
     output_path = Path(args.output)
-    count = generate_test_file(commands, output_path, config_path=args.config)
+    count = generate_test_file(by_base, output_path, config_path=args.config)
     print(f"Generated {count} test cases in {output_path}")
 
 
@@ -7,14 +7,31 @@ Reads session logs and extracts commands to suggest permission patterns.
 import json
 import os
 import re
-from collections import Counter
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
-from typing import Iterator
+from typing import Callable, Iterator, TypeVar
 
 from .shell_parser import parse_command, extract_base_command
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads  # stdlib fallback, also accepts bytes
+
+
+T = TypeVar("T")
+
+# Shared, never-mutated default for .get() so misses don't allocate a dict
+_EMPTY_DICT: dict = {}
+
+# Only this many chained commands are kept, as samples for display
+_CHAINED_SAMPLE_LIMIT = 50
+
 
 @dataclass
 class CommandRecord:
@@ -41,7 +58,7 @@ class HistoryAnalysis:
     total_commands: int
     unique_base_commands: Counter
     suggested_patterns: list[PatternSuggestion]
-    chained_commands: list[str]  # Commands with &&, ||, etc.
+    chained_commands: list[str]  # Sample of commands with &&, ||, etc.
 
 
 def find_session_dirs() -> list[Path]:
@@ -52,96 +69,151 @@ def find_session_dirs() -> list[Path]:
     if not projects_dir.exists():
         return []
 
-    session_dirs = []
-    for project_dir in projects_dir.iterdir():
-        if project_dir.is_dir():
-            session_dirs.append(project_dir)
-
-    return session_dirs
+    # os.scandir gets entry types from readdir, avoiding a stat() per entry
+    with os.scandir(projects_dir) as entries:
+        return [Path(e.path) for e in entries if e.is_dir()]
 
 
 def iter_session_files(session_dir: Path) -> Iterator[Path]:
     """Iterate over session JSONL files in a directory."""
-    for f in session_dir.iterdir():
-        if f.suffix == ".jsonl" and not f.name.startswith("sessions-"):
-            yield f
+    with os.scandir(session_dir) as entries:
+        for e in entries:
+            name = e.name
+            if name.endswith(".jsonl") and not name.startswith("sessions-"):
+                yield Path(e.path)
 
 
-def extract_commands_from_session(session_file: Path) -> Iterator[CommandRecord]:
+def extract_commands_from_session(
+    session_file: Path,
+    parse_timestamps: bool = False
+) -> Iterator[CommandRecord]:
     """
     Extract Bash commands from a session JSONL file.
 
     Session files contain JSON lines with various event types.
     We look for tool_use events with tool_name "Bash".
+
+    Timestamps are only parsed when `parse_timestamps` is True; otherwise
+    `CommandRecord.timestamp` is None (none of the analyses read it).
     """
-    session_id = session_file.stem
-    project_path = session_file.parent.name
+    data_bytes = _read_session(session_file)
+    if data_bytes is not None:
+        yield from _iter_session_records(session_file, data_bytes, parse_timestamps)
 
+
+def iter_commands_prefetched(
+    session_files: list[Path],
+    prefetch: int = 8
+) -> Iterator[CommandRecord]:
+    """
+    Extract Bash commands from many session files, in order.
+
+    File reads are submitted to a thread pool up to `prefetch` files ahead,
+    so read latency (many small files, network filesystems) overlaps with
+    parsing on the calling thread.
+    """
+    files = iter(session_files)
+    with ThreadPoolExecutor(max_workers=prefetch) as pool:
+        pending = deque(
+            (f, pool.submit(_read_session, f)) for f in islice(files, prefetch)
+        )
+        while pending:
+            session_file, future = pending.popleft()
+            next_file = next(files, None)
+            if next_file is not None:
+                pending.append((next_file, pool.submit(_read_session, next_file)))
+
+            data_bytes = future.result()
+            if data_bytes is not None:
+                yield from _iter_session_records(session_file, data_bytes)
+
+
+def _read_session(session_file: Path) -> bytes | None:
+    """Read a session file, or None if it can't be read."""
     try:
-        with open(session_file, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-
-                try:
-                    data = json.loads(line)
-                except json.JSONDecodeError:
-                    continue
-
-                # Look for bash commands in various formats
-                command = _extract_command(data)
-                if command:
-                    yield CommandRecord(
-                        command=command,
-                        session_id=session_id,
-                        timestamp=_parse_timestamp(data),
-                        project_path=project_path,
-                        was_allowed=None
-                    )
+        with open(session_file, 'rb') as f:
+            return f.read()
     except (IOError, OSError):
-        pass
+        return None
+
+
+def _iter_session_records(
+    session_file: Path,
+    data_bytes: bytes,
+    parse_timestamps: bool = False
+) -> Iterator[CommandRecord]:
+    """Extract Bash commands from the raw contents of a session file."""
+    session_id = session_file.stem
+    project_path = session_file.parent.name
+
+    # Split raw bytes instead of decoding and stripping each line in Python;
+    # both JSON parsers accept bytes and tolerate surrounding whitespace.
+    for line in data_bytes.split(b"\n"):
+        # Cheap substring pre-filter: only records mentioning both a Bash
+        # tool and a tool_use block can yield a command, so skip decoding
+        # the rest. _extract_command still rejects false positives.
+        if b'"Bash"' not in line or b'"tool_use"' not in line:
+            continue
+
+        try:
+            data = _json_loads(line)
+        except ValueError:  # JSONDecodeError, or invalid UTF-8
+            continue
+
+        # Look for bash commands in various formats
+        command = _extract_command(data)
+        if command:
+            yield CommandRecord(
+                command=command,
+                session_id=session_id,
+                timestamp=_parse_timestamp(data) if parse_timestamps else None,
+                project_path=project_path,
+                was_allowed=None
+            )
 
 
 def _extract_command(data: dict) -> str | None:
-    """Extract a bash command from a session log entry."""
+    """
+    Extract a bash command from a session log entry.
+
+    Parsed JSON only contains dicts, lists and scalars, so layouts are probed
+    by indexing directly; a record that doesn't fit a layout raises on the
+    first mismatch and we move on to the next one. Within a content list,
+    a block that doesn't fit (not a dict, or a non-dict input) is skipped
+    on its own so the blocks after it are still scanned.
+    """
     # Format 1: Claude Code session format - message.content[].tool_use
     # {"message": {"content": [{"type": "tool_use", "name": "Bash", "input": {"command": "..."}}]}}
-    message = data.get("message", {})
-    if isinstance(message, dict):
-        content = message.get("content", [])
-        if isinstance(content, list):
-            for block in content:
-                if isinstance(block, dict):
-                    if block.get("type") == "tool_use" and block.get("name") == "Bash":
-                        inp = block.get("input", {})
-                        if isinstance(inp, dict):
-                            return inp.get("command")
+    # By far the most common layout, so it is tried first.
+    try:
+        for block in data["message"]["content"]:
+            try:
+                if block.get("type") == "tool_use" and block.get("name") == "Bash":
+                    return block.get("input", _EMPTY_DICT).get("command")
+            except AttributeError:
+                continue
+    except (KeyError, TypeError):
+        pass
 
     # Format 2: Direct tool_use at top level
-    if data.get("type") == "tool_use" and data.get("tool_name") == "Bash":
-        tool_input = data.get("tool_input", {})
-        if isinstance(tool_input, dict):
-            return tool_input.get("command")
+    try:
+        if data.get("type") == "tool_use" and data.get("tool_name") == "Bash":
+            return data.get("tool_input", _EMPTY_DICT).get("command")
+    except AttributeError:
+        pass
 
-    # Format 3: Content at top level (older format)
-    if "content" in data and isinstance(data["content"], list):
+    # Format 3: Content at top level (older format). This also covers
+    # Format 4, {"role": "assistant", "content": [...]}, which is the same
+    # scan over the same list.
+    try:
         for block in data["content"]:
-            if isinstance(block, dict):
+            try:
                 if block.get("type") == "tool_use" and block.get("name") == "Bash":
-                    inp = block.get("input", {})
-                    if isinstance(inp, dict):
-                        return inp.get("command")
-
-    # Format 4: Direct role at top level
-    if data.get("role") == "assistant":
-        content = data.get("content", [])
-        if isinstance(content, list):
-            for item in content:
-                if isinstance(item, dict) and item.get("type") == "tool_use":
-                    if item.get("name") == "Bash":
-                        inp = item.get("input", {})
-                        return inp.get("command") if isinstance(inp, dict) else None
+                    return block.get("input", _EMPTY_DICT).get("command")
+            except AttributeError:
+                continue
+    except (KeyError, TypeError):
+        pass
 
     return None
 
@@ -155,13 +227,68 @@ def _parse_timestamp(data: dict) -> datetime | None:
                 if isinstance(ts, (int, float)):
                     return datetime.fromtimestamp(ts)
                 if isinstance(ts, str):
-                    # Try ISO format
-                    return datetime.fromisoformat(ts.replace("Z", "+00:00"))
+                    # Try ISO format (fromisoformat rejects "Z" before 3.11)
+                    if ts.endswith("Z"):
+                        ts = ts[:-1] + "+00:00"
+                    return datetime.fromisoformat(ts)
             except (ValueError, OSError):
                 pass
     return None
 
 
+def list_session_files(max_sessions: int | None = None) -> list[Path]:
+    """List session files across all project dirs, up to `max_sessions`."""
+    session_files = [
+        session_file
+        for session_dir in find_session_dirs()
+        for session_file in iter_session_files(session_dir)
+    ]
+    if max_sessions:
+        session_files = session_files[:max_sessions]
+    return session_files
+
+
+def map_sessions(func: Callable[[Path], T], session_files: list[Path]) -> Iterator[T]:
+    """
+    Apply `func` to each session file, yielding results in order.
+
+    Session files are independent and parsing them is CPU-bound, so work is
+    fanned out over a process pool. `func` must be a picklable module-level
+    function. Results are yielded as they arrive, so callers can merge them
+    without holding every session's result at once.
+    """
+    if len(session_files) < 2:
+        yield from map(func, session_files)
+        return
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+        yield from pool.map(func, session_files, chunksize=4)
+
+
+def _analyze_session(session_file: Path) -> tuple[int, Counter, Counter, list[str]]:
+    """Per-session worker for analyze_history."""
+    total_commands = 0
+    base_counts: Counter = Counter()
+    full_counts: Counter = Counter()
+    chained: list[str] = []
+
+    for record in extract_commands_from_session(session_file):
+        total_commands += 1
+        cmd = record.command
+
+        # Parse and analyze (parse_command caches repeated commands)
+        parsed = parse_command(cmd)
+        if not parsed.is_simple and len(chained) < _CHAINED_SAMPLE_LIMIT:
+            chained.append(cmd)
+
+        # Count base commands and full patterns
+        for seg in parsed.segments:
+            seg_cmd = seg.command
+            base_counts[extract_base_command(seg_cmd)] += 1
+            full_counts[seg_cmd] += 1
+
+    return total_commands, base_counts, full_counts, chained
+
+
 def analyze_history(
     max_sessions: int | None = None,
     min_frequency: int = 2
@@ -176,35 +303,20 @@ def analyze_history(
     Returns:
         HistoryAnalysis with patterns and statistics
     """
-    all_commands: list[CommandRecord] = []
+    total_commands = 0
     base_command_counter: Counter = Counter()
     full_command_counter: Counter = Counter()
     chained_commands: list[str] = []
 
-    session_dirs = find_session_dirs()
-    sessions_analyzed = 0
+    session_files = list_session_files(max_sessions)
 
-    for session_dir in session_dirs:
-        for session_file in iter_session_files(session_dir):
-            if max_sessions and sessions_analyzed >= max_sessions:
-                break
-
-            for record in extract_commands_from_session(session_file):
-                all_commands.append(record)
-                cmd = record.command
-
-                # Parse and analyze
-                parsed = parse_command(cmd)
-                if not parsed.is_simple:
-                    chained_commands.append(cmd)
-
-                # Count base commands and full patterns
-                for seg in parsed.segments:
-                    base = extract_base_command(seg.command)
-                    base_command_counter[base] += 1
-                    full_command_counter[seg.command] += 1
-
-            sessions_analyzed += 1
+    for count, base_counts, full_counts, chained in map_sessions(
+        _analyze_session, session_files
+    ):
+        total_commands += count
+        base_command_counter.update(base_counts)
+        full_command_counter.update(full_counts)
+        chained_commands.extend(chained[:_CHAINED_SAMPLE_LIMIT - len(chained_commands)])
 
     # Generate pattern suggestions
     suggestions = _generate_suggestions(
@@ -214,13 +326,49 @@ def analyze_history(
     )
 
     return HistoryAnalysis(
-        total_commands=len(all_commands),
+        total_commands=total_commands,
         unique_base_commands=base_command_counter,
         suggested_patterns=suggestions,
-        chained_commands=chained_commands[:50]  # Limit for display
+        chained_commands=chained_commands
     )
 
 
+# Well-known safe command patterns
+_SAFE_PATTERNS: dict[str, tuple[str, ...]] = {
+    "git": ("git *",),
+    "npm": ("npm *",),
+    "yarn": ("yarn *",),
+    "pnpm": ("pnpm *",),
+    "cargo": ("cargo *",),
+    "make": ("make *",),
+    "just": ("just *",),
+    "python": ("python *", "python3 *"),
+    "pip": ("pip *", "pip3 *"),
+    "poetry": ("poetry *",),
+    "go": ("go *",),
+    "rustc": ("rustc *",),
+    "node": ("node *",),
+    "deno": ("deno *",),
+    "bun": ("bun *",),
+    "docker": ("docker *",),
+    "kubectl": ("kubectl *",),
+    "ls": ("ls *",),
+    "cat": ("cat *",),
+    "head": ("head *",),
+    "tail": ("tail *",),
+    "grep": ("grep *",),
+    "find": ("find *",),
+    "rg": ("rg *",),
+    "fd": ("fd *",),
+    "tree": ("tree *",),
+    "pwd": ("pwd",),
+    "which": ("which *",),
+    "echo": ("echo *",),
+    "env": ("env",),
+    "printenv": ("printenv *",),
+}
+
+
 def _generate_suggestions(
     base_commands: Counter,
     full_commands: Counter,
@@ -229,58 +377,27 @@ def _generate_suggestions(
     """Generate pattern suggestions from command frequency data."""
     suggestions = []
 
-    # Well-known safe command patterns
-    SAFE_PATTERNS = {
-        "git": ["git *"],
-        "npm": ["npm *"],
-        "yarn": ["yarn *"],
-        "pnpm": ["pnpm *"],
-        "cargo": ["cargo *"],
-        "make": ["make *"],
-        "just": ["just *"],
-        "python": ["python *", "python3 *"],
-        "pip": ["pip *", "pip3 *"],
-        "poetry": ["poetry *"],
-        "go": ["go *"],
-        "rustc": ["rustc *"],
-        "node": ["node *"],
-        "deno": ["deno *"],
-        "bun": ["bun *"],
-        "docker": ["docker *"],
-        "kubectl": ["kubectl *"],
-        "ls": ["ls *"],
-        "cat": ["cat *"],
-        "head": ["head *"],
-        "tail": ["tail *"],
-        "grep": ["grep *"],
-        "find": ["find *"],
-        "rg": ["rg *"],
-        "fd": ["fd *"],
-        "tree": ["tree *"],
-        "pwd": ["pwd"],
-        "which": ["which *"],
-        "echo": ["echo *"],
-        "env": ["env"],
-        "printenv": ["printenv *"],
-    }
+    # Bucket up to 5 examples per base command from the 100 most common
+    # full commands, in a single pass
+    examples_by_base: dict[str, list[str]] = {}
+    for cmd, _ in full_commands.most_common(100):
+        examples = examples_by_base.setdefault(extract_base_command(cmd), [])
+        if len(examples) < 5:
+            examples.append(cmd)
 
     # Generate suggestions based on frequency
     for base_cmd, count in base_commands.most_common(50):
         if count < min_frequency:
             continue
 
-        # Get example commands
-        examples = [
-            cmd for cmd, _ in full_commands.most_common(100)
-            if extract_base_command(cmd) == base_cmd
-        ][:5]
+        examples = examples_by_base.get(base_cmd, [])
 
         # Determine pattern and confidence
-        if base_cmd in SAFE_PATTERNS:
-            patterns = SAFE_PATTERNS[base_cmd]
+        patterns = _SAFE_PATTERNS.get(base_cmd)
+        if patterns:
             confidence = 0.9
         else:
-            patterns = [f"{base_cmd} *"]
+            patterns = (f"{base_cmd} *",)
             confidence = 0.5  # Unknown command, lower confidence
 
         for pattern in patterns:
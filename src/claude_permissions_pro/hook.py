@@ -17,7 +17,7 @@ except ImportError:
 
 from .judge import JudgeConfig, JudgeError, evaluate as judge_evaluate
 from .logger import log_decision
-from .matcher import Matcher, Decision
+from .matcher import MODES, Matcher, Decision
 
 
 @dataclass
@@ -89,12 +89,21 @@ class Config:
 
     @classmethod
     def load(cls, path: Path) -> "Config":
-        """Load config from TOML file."""
+        """
+        Load config from TOML file.
+
+        Raises:
+            ValueError: If the file is not valid TOML or sets an unknown mode
+        """
         with open(path, "rb") as f:
             data = tomli.load(f)
 
         settings = data.get("settings", {})
         mode = settings.get("mode", "smart")
+        if mode not in MODES:
+            raise ValueError(
+                f"{path}: unknown mode {mode!r}; expected one of: {', '.join(MODES)}"
+            )
 
         allow_patterns = []
         for rule in data.get("allow", []):
@@ -125,14 +134,47 @@ class Config:
         )
 
 
+# Loaded config and its compiled matcher per config path, with the file's
+# (mtime in ns, size) at load time. Claude Code currently runs the hook in a
+# fresh process per tool call, so this only pays off when several checks
+# share a process.
+_config_cache: dict[str, tuple[tuple[int, int], Config, Matcher]] = {}
+
+
+def _load_config_and_matcher(config_path: Path) -> tuple[Config, Matcher]:
+    """Load config and build its matcher, reusing them until the file changes."""
+    key = str(config_path)
+    st = config_path.stat()
+    # Size too: an edit within the filesystem's timestamp resolution keeps mtime
+    stamp = (st.st_mtime_ns, st.st_size)
+    entry = _config_cache.get(key)
+    if entry is not None and entry[0] == stamp:
+        return entry[1], entry[2]
+
+    config = Config.load(config_path)
+    matcher = Matcher(
+        allow_patterns=config.allow_patterns,
+        deny_patterns=config.deny_patterns,
+        mode=config.mode,
+    )
+    _config_cache[key] = (stamp, config, matcher)
+    return config, matcher
+
+
 def run_hook(config_path: Path):
     """
     Run the permission hook.
 
     Reads from stdin, writes to stdout per Claude Code protocol.
     """
-    # Load config
-    config = Config.load(config_path)
+    # Load config (and matcher). A broken config must not break every Bash
+    # call, so report it and fall back to normal Claude Code permissions.
+    try:
+        config, matcher = _load_config_and_matcher(config_path)
+    except ValueError as e:
+        print(f"claude-permissions-pro: invalid config, passing through: {e}", file=sys.stderr)
+        HookOutput(decision="", reason="").write_stdout()
+        return
 
     # Read input
     hook_input = HookInput.from_stdin()
@@ -148,20 +190,13 @@ def run_hook(config_path: Path):
         HookOutput(decision="", reason="").write_stdout()
         return
 
-    # Create matcher and check
-    matcher = Matcher(
-        allow_patterns=config.allow_patterns,
-        deny_patterns=config.deny_patterns,
-        mode=config.mode,
-    )
-
     result = matcher.check(command)
 
     segments = result.segments_checked or [command]
     judge_decision = None
     judge_reason = None
 
-    if result.decision == Decision.ALLOW:
+    if result.decision is Decision.ALLOW:
         log_decision(
             command=command,
             cwd=hook_input.cwd,
@@ -174,7 +209,7 @@ def run_hook(config_path: Path):
             decision="allow",
             reason=result.reason
         ).write_stdout()
-    elif result.decision == Decision.DENY:
+    elif result.decision is Decision.DENY:
         log_decision(
             command=command,
             cwd=hook_input.cwd,
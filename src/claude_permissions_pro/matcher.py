@@ -6,20 +6,27 @@ Supports glob-style patterns and checks each segment of chained commands.
 
 import fnmatch
 import re
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
+from functools import lru_cache
+from itertools import groupby
+from operator import itemgetter
 from typing import Callable
 
 from .shell_parser import ParsedCommand, parse_command, extract_base_command
 
 
+# Chain handling modes accepted by Matcher (see Matcher.__init__)
+MODES = ("smart", "paranoid", "yolo")
+
+
 class Decision(Enum):
     ALLOW = "allow"
     DENY = "deny"
     ASK = "ask"  # Passthrough to user
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class MatchResult:
     """Result of matching a command against rules."""
     decision: Decision
@@ -28,13 +35,51 @@ class MatchResult:
     segments_checked: list[str] | None = None
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Pattern:
-    """A permission pattern."""
+    """A permission pattern (immutable, so instances can be shared)."""
     raw: str                    # Original pattern string
     is_regex: bool              # True if regex, False if glob
-    compiled: re.Pattern | None # Compiled regex or None for glob
     base_command: str | None    # If pattern starts with a command name
+    # Bound compiled.search (regex) or compiled.match (glob). Globs are
+    # translated and compiled on first use: a one-shot hook process only
+    # ever tries the few patterns the rule trie hands it.
+    _match: Callable[[str], re.Match | None] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self):
+        # Regexes are user-written, so compile them now to report errors at load
+        if self.is_regex:
+            self._bind()
+
+    @property
+    def regex_str(self) -> str:
+        """Regex source: the regex itself, or the glob's translation."""
+        if self.is_regex:
+            return self.raw[1:-1]
+        # Translate once so matching is a single compiled match() call
+        # instead of fnmatch's per-call translation cache lookup
+        regex_str = fnmatch.translate(self.raw)
+        if self.raw.endswith(" *"):
+            # "cmd *" patterns should also match bare "cmd" (no args).
+            # Shell keywords like `done`, `do`, `for`, `echo` appear bare as
+            # chain segments — without this, they'd cascade to ASK on the
+            # whole chain.
+            regex_str += "|" + re.escape(self.raw[:-2]) + r"\Z"
+        return regex_str
+
+    def _bind(self) -> Callable[[str], re.Match | None]:
+        """Compile the pattern and cache its bound match function."""
+        compiled = re.compile(self.regex_str)
+        match = compiled.search if self.is_regex else compiled.match
+        object.__setattr__(self, "_match", match)
+        return match
+
+    @property
+    def compiled(self) -> re.Pattern:
+        """The compiled regex (compiling it if not yet used)."""
+        return (self._match or self._bind()).__self__
 
     @staticmethod
     def _strip_env_prefixes(command: str) -> str:
@@ -107,11 +152,9 @@ class Pattern:
         """
         if pattern.startswith("/") and pattern.endswith("/"):
             # Regex pattern
-            regex_str = pattern[1:-1]
             return cls(
                 raw=pattern,
                 is_regex=True,
-                compiled=re.compile(regex_str),
                 base_command=None
             )
 
@@ -123,21 +166,22 @@ class Pattern:
         return cls(
             raw=pattern,
             is_regex=False,
-            compiled=None,
             base_command=base if base else None
         )
 
-    def matches(self, command: str) -> bool:
-        """Check if a command matches this pattern."""
+    @classmethod
+    def normalize(cls, command: str) -> str:
+        """Normalize a command into the form patterns are matched against."""
         command = command.strip()
 
         # Normalize: strip leading env-var assignments (e.g. FOO=bar cmd -> cmd)
         # Handles quoted values like COMPUTE_LEVEL="50 60 70 80 90"
-        command = self._strip_env_prefixes(command)
+        if '=' in command:
+            command = cls._strip_env_prefixes(command)
 
         # Normalize: strip sudo prefix (sudo is just privilege escalation,
         # the actual command determines safety)
-        command = self._strip_sudo(command)
+        command = cls._strip_sudo(command)
 
         # Normalize: strip ./ prefix for matching
         if command.startswith("./"):
@@ -147,29 +191,56 @@ class Pattern:
         # e.g., ".venv/bin/python foo" -> "python foo"
         # e.g., "/usr/bin/node script.js" -> "node script.js"
         # But skip redirect segments like ">/tmp/foo.log" or ">/dev/null"
-        parts = command.split(maxsplit=1)
-        if parts and '/' in parts[0] and not parts[0].startswith('>'):
-            binary = parts[0].rsplit('/', 1)[-1]
-            command = binary + (' ' + parts[1] if len(parts) > 1 else '')
+        if '/' in command:
+            parts = command.split(maxsplit=1)
+            if parts and '/' in parts[0] and not parts[0].startswith('>'):
+                binary = parts[0].rsplit('/', 1)[-1]
+                command = binary + (' ' + parts[1] if len(parts) > 1 else '')
 
-        if self.is_regex and self.compiled:
-            return bool(self.compiled.search(command))
+        return command
 
-        # Glob matching
-        if fnmatch.fnmatch(command, self.raw):
-            return True
+    @property
+    def literal_prefix(self) -> tuple[str, ...]:
+        """
+        Whole words that every command this pattern matches must start with.
 
-        # "cmd *" patterns should also match bare "cmd" (no args).
-        # Shell keywords like `done`, `do`, `for`, `echo` appear bare as
-        # chain segments — without this, they'd cascade to ASK on the
-        # whole chain.
-        if self.raw.endswith(" *") and command == self.raw[:-2]:
-            return True
+        Words are taken up to the first wildcard; a word cut off by a
+        wildcard ("git com*") is dropped. Empty for regexes and for globs
+        with leading whitespace, which can match commands starting with
+        any word.
+        """
+        raw = self.raw
+        if self.is_regex or not raw or raw[0].isspace():
+            return ()
+        wild = min((i for i in map(raw.find, "*?[") if i != -1), default=-1)
+        if wild == -1:
+            return tuple(raw.split())
+        literal = raw[:wild]
+        words = literal.split()
+        if literal and not literal[-1].isspace():
+            words.pop()
+        return tuple(words)
 
-        return False
+    def matches(self, command: str) -> bool:
+        """Check if a command matches this pattern."""
+        return self.matches_normalized(self.normalize(command))
+
+    def matches_normalized(self, command: str) -> bool:
+        """Like matches(), for a command already passed through normalize()."""
+        return (self._match or self._bind())(command) is not None
+
+
+# Chain segments repeat a lot (echo, cd, grep...), so cache normalization
+_normalize = lru_cache(maxsize=4096)(Pattern.normalize)
+
+
+@lru_cache(maxsize=2048)
+def _cached_pattern(raw: str) -> Pattern:
+    """Pattern.from_string, shared across Matcher instances."""
+    return Pattern.from_string(raw)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Rule:
     """A permission rule."""
     patterns: list[Pattern]
@@ -177,11 +248,123 @@ class Rule:
 
     def matches(self, command: str) -> Pattern | None:
         """Return the first matching pattern, or None."""
+        return self.matches_normalized(_normalize(command))
+
+    def matches_normalized(self, command: str) -> Pattern | None:
+        """Like matches(), for a command already passed through Pattern.normalize()."""
         for p in self.patterns:
-            if p.matches(command):
+            if p.matches_normalized(command):
                 return p
         return None
 
+    @property
+    def literal_prefix(self) -> tuple[str, ...]:
+        """Leading words shared by all of this rule's patterns (see Pattern.literal_prefix)."""
+        prefixes = [p.literal_prefix for p in self.patterns]
+        if not prefixes:
+            return ()
+        common = prefixes[0]
+        for prefix in prefixes[1:]:
+            n = 0
+            while n < min(len(common), len(prefix)) and common[n] == prefix[n]:
+                n += 1
+            common = common[:n]
+        return common
+
+
+class _GlobAlternation:
+    """
+    Consecutive single-glob rules matched with one alternation regex.
+
+    Alternatives are tried left to right, so the group that matches is the
+    first matching rule in config order, as when matching them one by one.
+    """
+
+    def __init__(self, patterns: list[Pattern]):
+        self._by_group = {f"r{i}": p for i, p in enumerate(patterns)}
+        alternatives = []
+        for name, p in self._by_group.items():
+            # Older fnmatch.translate emits named groups (g0, g1...); keep
+            # them unique across alternatives
+            regex_str = re.sub(r"\(\?P([<=])g", rf"(?P\1{name}_g", p.regex_str)
+            alternatives.append(f"(?P<{name}>{regex_str})")
+        self._match = re.compile("|".join(alternatives)).match
+
+    def matches_normalized(self, command: str) -> Pattern | None:
+        """The first pattern matching a normalized command, or None."""
+        m = self._match(command)
+        return self._by_group[m.lastgroup] if m else None
+
+
+def _is_single_glob(rule: Rule) -> bool:
+    return len(rule.patterns) == 1 and not rule.patterns[0].is_regex
+
+
+def _combine_globs(rules: list[Rule]) -> list[Rule | _GlobAlternation]:
+    """Replace each run of two or more single-glob rules with a _GlobAlternation."""
+    combined: list[Rule | _GlobAlternation] = []
+    for is_glob, run in groupby(rules, key=_is_single_glob):
+        run = list(run)
+        if is_glob and len(run) > 1:
+            combined.append(_GlobAlternation([rule.patterns[0] for rule in run]))
+        else:
+            combined.extend(run)
+    return combined
+
+
+@dataclass(slots=True)
+class _RuleTrieNode:
+    """A word in _RuleTrie."""
+    children: dict[str, "_RuleTrieNode"] = field(default_factory=dict)
+    rules: list[tuple[int, Rule]] = field(default_factory=list)  # (config index, rule)
+    merged: list[Rule] = field(default_factory=list)  # This node's and its ancestors' rules
+    # `merged` with glob runs combined, built on the first lookup reaching
+    # this node (most nodes are never reached by a one-shot hook process)
+    matching: list[Rule | _GlobAlternation] | None = None
+
+
+class _RuleTrie:
+    """
+    Rules indexed by the literal leading words of their patterns.
+
+    "git commit *" is stored at root -> git -> commit; regexes and globs
+    starting with a wildcard sit at the root. A command walks the trie by
+    its words, and the deepest node reached lists, in config order, every
+    rule that could match it. Those are then matched in full, so wildcard
+    semantics (e.g. `*` spanning spaces) are unchanged.
+    """
+
+    def __init__(self, rules: list[Rule]):
+        self._root = _RuleTrieNode()
+        self._depth = 0
+        for index, rule in enumerate(rules):
+            prefix = rule.literal_prefix
+            node = self._root
+            for word in prefix:
+                node = node.children.setdefault(word, _RuleTrieNode())
+            node.rules.append((index, rule))
+            self._depth = max(self._depth, len(prefix))
+
+        # Precompute each node's candidates so a lookup is just the walk
+        stack = [(self._root, [])]
+        while stack:
+            node, inherited = stack.pop()
+            merged = sorted(inherited + node.rules, key=itemgetter(0))
+            node.merged = [rule for _, rule in merged]
+            stack.extend((child, merged) for child in node.children.values())
+
+    def candidates(self, command: str) -> list[Rule | _GlobAlternation]:
+        """Rules that could match a normalized command, in config order."""
+        node = self._root
+        for word in command.split(maxsplit=self._depth)[:self._depth]:
+            child = node.children.get(word)
+            if child is None:
+                break
+            node = child
+        if node.matching is None:
+            node.matching = _combine_globs(node.merged)
+        return node.matching
+
 
 class Matcher:
     """
@@ -206,17 +389,48 @@ class Matcher:
                 - smart: Parse chains, allow if all segments match
                 - paranoid: Block any chain with unknown segments
                 - yolo: Allow chains if ANY segment matches
+
+        Raises:
+            ValueError: If mode is not one of the above
         """
         self.allow_rules = [
-            Rule(patterns=[Pattern.from_string(p)], decision=Decision.ALLOW)
+            Rule(patterns=[_cached_pattern(p)], decision=Decision.ALLOW)
             for p in allow_patterns
         ]
         self.deny_rules = [
-            Rule(patterns=[Pattern.from_string(p)], decision=Decision.DENY)
+            Rule(patterns=[_cached_pattern(p)], decision=Decision.DENY)
             for p in (deny_patterns or [])
         ]
         self.mode = mode
 
+        # The mode is fixed, so pick its chain checker once
+        chain_checkers = {
+            "smart": self._check_chain_smart,
+            "paranoid": self._check_chain_paranoid,
+            "yolo": self._check_chain_yolo,
+        }
+        if mode not in chain_checkers:
+            raise ValueError(
+                f"Unknown mode {mode!r}; expected one of: {', '.join(MODES)}"
+            )
+        self._check_chain = chain_checkers[mode]
+
+        # Only rules that can match a command's leading words are scanned
+        self._allow_trie = _RuleTrie(self.allow_rules)
+        self._deny_trie = _RuleTrie(self.deny_rules)
+
+        # Chain segments repeat within and across commands (cd, echo, grep...),
+        # and a segment's result depends only on its text
+        self._check_segment = lru_cache(maxsize=4096)(self._check_single)
+
+    @staticmethod
+    def clear_caches():
+        """Drop all module-level caches: shared patterns, normalized commands, parses."""
+        _cached_pattern.cache_clear()
+        _normalize.cache_clear()
+        parse_command.cache_clear()
+        extract_base_command.cache_clear()
+
     def check(self, command: str) -> MatchResult:
         """
         Check if a command should be allowed.
@@ -226,13 +440,8 @@ class Matcher:
         parsed = parse_command(command)
 
         # First check deny rules against the whole command
-        for rule in self.deny_rules:
-            if pattern := rule.matches(command):
-                return MatchResult(
-                    decision=Decision.DENY,
-                    reason=f"Matches deny pattern: {pattern.raw}",
-                    matched_rule=pattern.raw
-                )
+        if denied := self._check_deny(_normalize(command)):
+            return denied
 
         # For simple commands, just check allow rules
         if parsed.is_simple and len(parsed.segments) == 1:
@@ -261,6 +470,17 @@ class Matcher:
             return True
         return False
 
+    def _check_deny(self, normalized: str) -> MatchResult | None:
+        """DENY result for the first deny rule matching a normalized command, or None."""
+        for rule in self._deny_trie.candidates(normalized):
+            if pattern := rule.matches_normalized(normalized):
+                return MatchResult(
+                    decision=Decision.DENY,
+                    reason=f"Matches deny pattern: {pattern.raw}",
+                    matched_rule=pattern.raw
+                )
+        return None
+
     def _check_single(self, command: str) -> MatchResult:
         """Check a single command (no chains)."""
         # Bare variable assignments (e.g., FOO="bar") are safe — no execution
@@ -270,16 +490,13 @@ class Matcher:
                 reason="Bare variable assignment (no execution)",
             )
 
-        for rule in self.deny_rules:
-            if pattern := rule.matches(command):
-                return MatchResult(
-                    decision=Decision.DENY,
-                    reason=f"Matches deny pattern: {pattern.raw}",
-                    matched_rule=pattern.raw
-                )
+        # Normalize once; every rule is matched against the same string
+        normalized = _normalize(command)
+        if denied := self._check_deny(normalized):
+            return denied
 
-        for rule in self.allow_rules:
-            if pattern := rule.matches(command):
+        for rule in self._allow_trie.candidates(normalized):
+            if pattern := rule.matches_normalized(normalized):
                 return MatchResult(
                     decision=Decision.ALLOW,
                     reason=f"Matches allow pattern: {pattern.raw}",
@@ -291,68 +508,95 @@ class Matcher:
             reason="No matching rule"
         )
 
-    def _check_chain(self, parsed: ParsedCommand) -> MatchResult:
-        """Check a chained command."""
+    @staticmethod
+    def _denied_chain(seg: str, result: MatchResult, segments: list[str]) -> MatchResult:
+        """Deny a whole chain because one of its segments is denied."""
+        return MatchResult(
+            decision=Decision.DENY,
+            reason=f"Segment '{seg}' denied: {result.reason}",
+            matched_rule=result.matched_rule,
+            segments_checked=segments
+        )
+
+    def _check_chain_smart(self, parsed: ParsedCommand) -> MatchResult:
+        """Check a chained command: allow only if all segments are allowed."""
         segments = [s.command for s in parsed.segments]
-        results = []
+        first_unknown = None
 
         for seg in segments:
-            result = self._check_single(seg)
-            results.append((seg, result))
+            if first_unknown is None:
+                result = self._check_segment(seg)
+            elif self._is_bare_assignment(seg):
+                continue
+            else:
+                # Already settled on ASK unless a later segment is denied,
+                # so skip its allow rules
+                result = self._check_deny(_normalize(seg))
+                if result is None:
+                    continue
 
             # If any segment is denied, deny the whole chain
-            if result.decision == Decision.DENY:
-                return MatchResult(
-                    decision=Decision.DENY,
-                    reason=f"Segment '{seg}' denied: {result.reason}",
-                    matched_rule=result.matched_rule,
-                    segments_checked=segments
-                )
+            if result.decision is Decision.DENY:
+                return self._denied_chain(seg, result, segments)
+            if result.decision is Decision.ASK:
+                first_unknown = seg
 
-        # Count allowed vs unknown
-        allowed = [r for r in results if r[1].decision == Decision.ALLOW]
-        unknown = [r for r in results if r[1].decision == Decision.ASK]
+        if first_unknown is None:
+            return MatchResult(
+                decision=Decision.ALLOW,
+                reason=f"All {len(segments)} segments match allow patterns",
+                segments_checked=segments
+            )
+        return MatchResult(
+            decision=Decision.ASK,
+            reason=f"Unknown segment: '{first_unknown}'",
+            segments_checked=segments
+        )
 
-        if self.mode == "smart":
-            # All segments must be allowed
-            if len(allowed) == len(results):
-                return MatchResult(
-                    decision=Decision.ALLOW,
-                    reason=f"All {len(segments)} segments match allow patterns",
-                    segments_checked=segments
-                )
-            else:
-                unknown_cmds = [r[0] for r in unknown]
-                return MatchResult(
-                    decision=Decision.ASK,
-                    reason=f"Unknown segments: {unknown_cmds}",
-                    segments_checked=segments
-                )
+    def _check_chain_yolo(self, parsed: ParsedCommand) -> MatchResult:
+        """Check a chained command: allow if any segment is allowed."""
+        segments = [s.command for s in parsed.segments]
+        allowed_n = 0
 
-        elif self.mode == "yolo":
-            # Any allowed segment = allow whole chain
-            if allowed:
-                return MatchResult(
-                    decision=Decision.ALLOW,
-                    reason=f"{len(allowed)}/{len(segments)} segments matched",
-                    segments_checked=segments
-                )
+        for seg in segments:
+            result = self._check_segment(seg)
+            if result.decision is Decision.DENY:
+                return self._denied_chain(seg, result, segments)
+            if result.decision is Decision.ALLOW:
+                allowed_n += 1
+
+        if allowed_n:
             return MatchResult(
-                decision=Decision.ASK,
-                reason="No segments matched allow patterns",
+                decision=Decision.ALLOW,
+                reason=f"{allowed_n}/{len(segments)} segments matched",
                 segments_checked=segments
             )
+        return MatchResult(
+            decision=Decision.ASK,
+            reason="No segments matched allow patterns",
+            segments_checked=segments
+        )
 
-        else:  # paranoid
-            # Any unknown = ask
-            if unknown:
-                return MatchResult(
-                    decision=Decision.ASK,
-                    reason=f"Unknown segments in chain: {[r[0] for r in unknown]}",
-                    segments_checked=segments
-                )
+    def _check_chain_paranoid(self, parsed: ParsedCommand) -> MatchResult:
+        """Check a chained command: ask if any segment is unknown."""
+        segments = [s.command for s in parsed.segments]
+        unknown_cmds = []
+
+        for seg in segments:
+            result = self._check_segment(seg)
+            if result.decision is Decision.DENY:
+                return self._denied_chain(seg, result, segments)
+            if result.decision is Decision.ASK:
+                unknown_cmds.append(seg)
+
+        if unknown_cmds:
             return MatchResult(
-                decision=Decision.ALLOW,
-                reason="All segments verified",
+                decision=Decision.ASK,
+                reason=f"Unknown segments in chain: {unknown_cmds}",
                 segments_checked=segments
             )
+        return MatchResult(
+            decision=Decision.ALLOW,
+            reason="All segments verified",
+            segments_checked=segments
+        )
@@ -9,6 +9,7 @@ import re
 import shlex
 from dataclasses import dataclass
 from enum import Enum
+from functools import lru_cache
 from typing import Iterator
 
 
@@ -21,7 +22,24 @@ class Operator(Enum):
     BG = "&"        # Run in background (single &)
 
 
-@dataclass
+# Characters that can end a segment: &&, ||, ;, |, & and newline
+_SPLIT_CHARS = frozenset("&|;\n")
+
+
+# Runs of characters with no special meaning in each scanner state. Anything
+# else (quotes, escapes, subshells, operators, heredocs) is handled one
+# character at a time.
+_PLAIN_RUN_RE = re.compile(r"[^\\'\"$()`<&|;\n]+")
+_SINGLE_QUOTED_RUN_RE = re.compile(r"[^']+")
+_DOUBLE_QUOTED_RUN_RE = re.compile(r'[^"\\]+')
+_SUBSHELL_RUN_RE = re.compile(r"[^\\'\"$()`]+")
+
+# What may follow a word for shlex to end it there (str.split also breaks
+# on other whitespace, which shlex keeps inside the word)
+_SHLEX_WORD_ENDS = frozenset(("", " ", "\t", "\r", "\n"))
+
+
+@dataclass(frozen=True, slots=True)
 class CommandSegment:
     """A single command segment in a chain."""
     command: str           # The raw command string
@@ -30,11 +48,11 @@ class CommandSegment:
     has_redirect: bool     # Contains >, <, >>
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ParsedCommand:
     """Result of parsing a shell command."""
     original: str
-    segments: list[CommandSegment]
+    segments: tuple[CommandSegment, ...]
     is_simple: bool        # Single command, no chains/pipes
 
     def iter_commands(self) -> Iterator[str]:
@@ -43,10 +61,13 @@ class ParsedCommand:
             yield seg.command
 
 
+@lru_cache(maxsize=4096)
 def parse_command(cmd: str) -> ParsedCommand:
     """
     Parse a shell command into segments.
 
+    Results are cached, so repeated commands are only scanned once.
+
     Handles:
     - && (AND chains)
     - || (OR chains)
@@ -65,7 +86,18 @@ def parse_command(cmd: str) -> ParsedCommand:
         True  # && is inside quotes, not an operator
     """
     segments = []
-    current_cmd = ""
+
+    # Fast path: without an operator character (or a newline, which acts
+    # like ;) nothing can split the command, so skip the scanner
+    if _SPLIT_CHARS.isdisjoint(cmd):
+        _flush_segment(segments, cmd, None)
+        return ParsedCommand(
+            original=cmd,
+            segments=tuple(segments),
+            is_simple=not (segments and segments[0].has_subshell)
+        )
+
+    current_parts: list[str] = []  # joined when a segment is flushed
     current_op = None
 
     # Track quote state
@@ -88,7 +120,7 @@ def parse_command(cmd: str) -> ParsedCommand:
         # Heredoc body: consume everything until delimiter on its own line
         if heredoc_delim is not None:
             if char == '\n':
-                current_cmd += char
+                current_parts.append(char)
                 i += 1
                 if not heredoc_started:
                     heredoc_started = True
@@ -100,98 +132,117 @@ def parse_command(cmd: str) -> ParsedCommand:
                 line = cmd[i:line_end].strip()
                 if line == heredoc_delim:
                     # Consume the delimiter line
-                    current_cmd += cmd[i:line_end]
+                    current_parts.append(cmd[i:line_end])
                     i = line_end
                     heredoc_delim = None
                     heredoc_started = False
                 continue
-            current_cmd += char
-            i += 1
+            # Rest of the heredoc line, in one slice
+            line_end = cmd.find('\n', i)
+            if line_end == -1:
+                line_end = len(cmd)
+            current_parts.append(cmd[i:line_end])
+            i = line_end
             continue
 
+        # Consume a run of characters that can't change parser state in one
+        # regex match, instead of one loop iteration per character
+        if not escape_next:
+            if in_single_quote:
+                run = _SINGLE_QUOTED_RUN_RE.match(cmd, i)
+            elif in_double_quote:
+                run = _DOUBLE_QUOTED_RUN_RE.match(cmd, i)
+            elif paren_depth > 0 or in_backtick:
+                run = _SUBSHELL_RUN_RE.match(cmd, i)
+            else:
+                run = _PLAIN_RUN_RE.match(cmd, i)
+            if run:
+                current_parts.append(run.group())
+                i = run.end()
+                continue
+
         # Handle escape sequences
         if escape_next:
-            current_cmd += char
+            current_parts.append(char)
             escape_next = False
             i += 1
             continue
 
         if char == '\\' and not in_single_quote:
             escape_next = True
-            current_cmd += char
+            current_parts.append(char)
             i += 1
             continue
 
         # Handle quotes
         if char == "'" and not in_double_quote:
             in_single_quote = not in_single_quote
-            current_cmd += char
+            current_parts.append(char)
             i += 1
             continue
 
         if char == '"' and not in_single_quote:
             in_double_quote = not in_double_quote
-            current_cmd += char
+            current_parts.append(char)
             i += 1
             continue
 
         # Skip operator detection inside quotes
         if in_single_quote or in_double_quote:
-            current_cmd += char
+            current_parts.append(char)
             i += 1
             continue
 
         # Track subshells $()
         if char == '$' and i + 1 < len(cmd) and cmd[i + 1] == '(':
             paren_depth += 1
-            current_cmd += '$('
+            current_parts.append('$(')
             i += 2  # Consume both $ and ( to avoid double-counting
             continue
 
         if char == '(' and paren_depth > 0:
             paren_depth += 1
-            current_cmd += char
+            current_parts.append(char)
             i += 1
             continue
 
         if char == ')' and paren_depth > 0:
             paren_depth -= 1
-            current_cmd += char
+            current_parts.append(char)
             i += 1
             continue
 
         # Track backticks
         if char == '`':
             in_backtick = not in_backtick
-            current_cmd += char
+            current_parts.append(char)
             i += 1
             continue
 
         # Skip operator detection inside subshells
         if paren_depth > 0 or in_backtick:
-            current_cmd += char
+            current_parts.append(char)
             i += 1
             continue
 
         # Detect heredoc: << DELIM or <<'DELIM' or <<"DELIM" or <<-DELIM
-        two_char = cmd[i:i+2] if i + 1 < len(cmd) else ""
-        if two_char == "<<" and (i + 2 >= len(cmd) or cmd[i + 2] != '<'):
-            current_cmd += "<<"
+        if char == "<" and cmd.startswith("<<", i) and not cmd.startswith("<<<", i):
+            current_parts.append("<<")
             j = i + 2
             # Skip optional - (for <<-)
             if j < len(cmd) and cmd[j] == '-':
-                current_cmd += '-'
+                current_parts.append('-')
                 j += 1
             # Skip whitespace between << and delimiter
             while j < len(cmd) and cmd[j] in ' \t':
-                current_cmd += cmd[j]
+                current_parts.append(cmd[j])
                 j += 1
             # Extract delimiter (possibly quoted)
             if j < len(cmd):
                 quote_char = None
                 if cmd[j] in ("'", '"'):
                     quote_char = cmd[j]
-                    current_cmd += cmd[j]
+                    current_parts.append(cmd[j])
                     j += 1
                 delim_start = j
                 while j < len(cmd) and cmd[j] not in ('\n', ' ', '\t', ';'):
@@ -199,46 +250,53 @@ def parse_command(cmd: str) -> ParsedCommand:
                         break
                     j += 1
                 heredoc_delim = cmd[delim_start:j]
-                current_cmd += cmd[delim_start:j]
+                current_parts.append(cmd[delim_start:j])
                 if quote_char and j < len(cmd) and cmd[j] == quote_char:
-                    current_cmd += cmd[j]
+                    current_parts.append(cmd[j])
                     j += 1
                 heredoc_started = False
             i = j
             continue
 
+        # Everything below handles operators; other characters just
+        # extend the current segment
+        if char not in _SPLIT_CHARS:
+            current_parts.append(char)
+            i += 1
+            continue
+
         # Check for two-character operators
-        if two_char == "&&":
-            _flush_segment(segments, current_cmd, current_op)
-            current_cmd = ""
+        if cmd.startswith("&&", i):
+            _flush_segment(segments, "".join(current_parts), current_op)
+            current_parts.clear()
             current_op = Operator.AND
             i += 2
             continue
 
-        if two_char == "||":
-            _flush_segment(segments, current_cmd, current_op)
-            current_cmd = ""
+        if cmd.startswith("||", i):
+            _flush_segment(segments, "".join(current_parts), current_op)
+            current_parts.clear()
             current_op = Operator.OR
             i += 2
             continue
 
         # Single character operators
         if char == ";" or char == "\n":
-            _flush_segment(segments, current_cmd, current_op)
-            current_cmd = ""
+            _flush_segment(segments, "".join(current_parts), current_op)
+            current_parts.clear()
             current_op = Operator.SEMI
             i += 1
             continue
 
         if char == "|":
-            _flush_segment(segments, current_cmd, current_op)
-            current_cmd = ""
+            _flush_segment(segments, "".join(current_parts), current_op)
+            current_parts.clear()
             current_op = Operator.PIPE
             i += 1
             continue
 
         # Background operator (single &, not && and not part of redirect like 2>&1)
-        if char == "&" and (i + 1 >= len(cmd) or cmd[i + 1] != "&"):
+        if char == "&":
             # Check if this is part of a redirect pattern
             is_redirect = False
 
@@ -255,22 +313,23 @@ def parse_command(cmd: str) -> ParsedCommand:
                     is_redirect = True
 
             if not is_redirect:
-                _flush_segment(segments, current_cmd, current_op)
-                current_cmd = ""
+                _flush_segment(segments, "".join(current_parts), current_op)
+                current_parts.clear()
                 current_op = Operator.BG
                 i += 1
                 continue
 
-        current_cmd += char
+        current_parts.append(char)
         i += 1
 
     # Flush final segment
-    _flush_segment(segments, current_cmd, current_op)
+    _flush_segment(segments, "".join(current_parts), current_op)
 
     return ParsedCommand(
         original=cmd,
-        segments=segments,
-        is_simple=len(segments) <= 1 and not any(s.has_subshell for s in segments)
+        segments=tuple(segments),
+        # Only a lone segment can be simple, so there's nothing to sweep
+        is_simple=not segments or (len(segments) == 1 and not segments[0].has_subshell)
     )
 
 
@@ -281,7 +340,7 @@ def _flush_segment(segments: list[CommandSegment], cmd: str, op: Operator | None
         return
 
     has_subshell = "$(" in cmd or "`" in cmd
-    has_redirect = bool(re.search(r'[<>]', cmd))
+    has_redirect = '<' in cmd or '>' in cmd
 
     segments.append(CommandSegment(
         command=cmd,
@@ -291,10 +350,13 @@ def _flush_segment(segments: list[CommandSegment], cmd: str, op: Operator | None
     ))
 
 
+@lru_cache(maxsize=8192)
 def extract_base_command(cmd: str) -> str:
     """
     Extract the base command (executable name) from a command string.
 
+    Results are cached, like parse_command's.
+
     Examples:
         >>> extract_base_command("npm install --save foo")
         'npm'
@@ -305,13 +367,23 @@ def extract_base_command(cmd: str) -> str:
     """
     cmd = cmd.strip()
 
-    # Skip leading env var assignments
-    while '=' in cmd.split()[0] if cmd.split() else False:
+    # Skip leading env var assignments, splitting off one token at a time
+    parts = cmd.split(maxsplit=1)
+    while len(parts) > 1 and '=' in parts[0]:
+        cmd = parts[1]
         parts = cmd.split(maxsplit=1)
-        if len(parts) > 1:
-            cmd = parts[1]
-        else:
-            break
+
+    if not parts:
+        return cmd
+
+    # Fast path: a first word with no quoting, ending where shlex would also
+    # end it, is already the first token
+    first = parts[0]
+    if (
+        "'" not in first and '"' not in first and '\\' not in first
+        and cmd[len(first):len(first) + 1] in _SHLEX_WORD_ENDS
+    ):
+        return first.rsplit('/', 1)[-1]
 
     # Get first token
     try:
@@ -0,0 +1,37 @@
+"""Tests for pytest generation from history."""
+
+import ast
+import warnings
+
+from claude_permissions_pro.generate_tests import generate_test_file
+
+
+class TestGenerateTestFile:
+    def test_command_literals_round_trip(self, tmp_path):
+        """Quotes, backslashes, control characters and non-BMP text survive as literals."""
+        cmds = [
+            "echo \"double\" 'single'",
+            "printf 'a\\tb\\\\n' \\\\",
+            "echo '\"\"\"'",
+            "echo $'\\x00' \x00 \x1b[31m \x7f",
+            "echo line1\nline2\r\n",
+            "echo café \U0001F600  ",
+        ]
+        output = tmp_path / "test_out.py"
+        count = generate_test_file(
+            {'echo"\\': cmds}, output, config_path=str(tmp_path / "missing.toml")
+        )
+        assert count == len(cmds)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")  # e.g. invalid escape sequences
+            tree = ast.parse(output.read_text(encoding="utf-8"))
+
+        literals = [
+            node.value.value
+            for node in ast.walk(tree)
+            if isinstance(node, ast.Assign)
+            and isinstance(node.targets[0], ast.Name)
+            and node.targets[0].id == "cmd"
+        ]
+        assert literals == cmds
@@ -0,0 +1,182 @@
+"""Tests for session history extraction."""
+
+import json
+from datetime import datetime, timezone
+
+from claude_permissions_pro.history import (
+    analyze_history,
+    extract_commands_from_session,
+    find_session_dirs,
+    iter_commands_prefetched,
+    iter_session_files,
+    list_session_files,
+)
+
+
+def _bash_line(command: str) -> str:
+    return json.dumps({
+        "type": "assistant",
+        "message": {
+            "role": "assistant",
+            "content": [
+                {"type": "tool_use", "name": "Bash", "input": {"command": command}},
+            ],
+        },
+    })
+
+
+class TestExtractCommandsFromSession:
+    def test_extracts_bash_commands(self, tmp_path):
+        session = tmp_path / "abc.jsonl"
+        session.write_text("\n".join([
+            _bash_line("git status"),
+            json.dumps({"type": "user", "message": {"role": "user", "content": "hi"}}),
+            _bash_line("npm test && npm run build"),
+        ]) + "\n")
+
+        records = list(extract_commands_from_session(session))
+        assert [r.command for r in records] == ["git status", "npm test && npm run build"]
+        assert records[0].session_id == "abc"
+        assert records[0].project_path == tmp_path.name
+
+    def test_skips_blank_and_malformed_lines(self, tmp_path):
+        session = tmp_path / "s.jsonl"
+        session.write_bytes(
+            b"\n"
+            b"   \n"
+            b"{not json\n"
+            b"\xff\xfe\n"
+            + _bash_line("ls -la").encode() + b"\r\n"
+        )
+
+        records = list(extract_commands_from_session(session))
+        assert [r.command for r in records] == ["ls -la"]
+
+    def test_top_level_tool_use_format(self, tmp_path):
+        session = tmp_path / "s.jsonl"
+        session.write_text(json.dumps({
+            "type": "tool_use",
+            "tool_name": "Bash",
+            "tool_input": {"command": "make test"},
+        }) + "\n")
+
+        records = list(extract_commands_from_session(session))
+        assert [r.command for r in records] == ["make test"]
+
+    def test_ignores_other_tools(self, tmp_path):
+        session = tmp_path / "s.jsonl"
+        session.write_text(json.dumps({
+            "message": {"content": [
+                {"type": "tool_use", "name": "Read", "input": {"file_path": "/tmp/x"}},
+            ]},
+        }) + "\n")
+
+        assert list(extract_commands_from_session(session)) == []
+
+    def test_prefilter_false_positive_is_rejected(self, tmp_path):
+        # Mentions both "Bash" and "tool_use" as plain strings, but has no
+        # actual Bash tool_use block.
+        session = tmp_path / "s.jsonl"
+        session.write_text(json.dumps({
+            "message": {"content": [
+                {"type": "text", "text": "Bash"},
+                {"type": "tool_use", "name": "Read", "input": {"file_path": "x"}},
+            ]},
+        }) + "\n")
+
+        assert list(extract_commands_from_session(session)) == []
+
+    def test_malformed_block_does_not_hide_later_ones(self, tmp_path):
+        blocks = [
+            "text",
+            {"type": "tool_use", "name": "Bash", "input": None},
+            {"type": "tool_use", "name": "Bash", "input": {"command": "make"}},
+        ]
+        session = tmp_path / "s.jsonl"
+        session.write_text(
+            json.dumps({"message": {"content": blocks}}) + "\n"
+            + json.dumps({"role": "assistant", "content": blocks}) + "\n"
+        )
+
+        assert [r.command for r in extract_commands_from_session(session)] == ["make", "make"]
+
+    def test_non_object_records_are_skipped(self, tmp_path):
+        session = tmp_path / "s.jsonl"
+        session.write_text('["Bash", "tool_use"]\n"Bash tool_use"\n' + _bash_line("pwd"))
+
+        assert [r.command for r in extract_commands_from_session(session)] == ["pwd"]
+
+    def test_timestamps_only_parsed_on_request(self, tmp_path):
+        session = tmp_path / "s.jsonl"
+        data = json.loads(_bash_line("git log"))
+        data["timestamp"] = "2025-01-02T03:04:05Z"
+        session.write_text(json.dumps(data) + "\n")
+
+        [record] = extract_commands_from_session(session)
+        assert record.timestamp is None
+
+        [record] = extract_commands_from_session(session, parse_timestamps=True)
+        assert record.timestamp == datetime(2025, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+
+    def test_missing_file(self, tmp_path):
+        assert list(extract_commands_from_session(tmp_path / "missing.jsonl")) == []
+
+
+class TestIterCommandsPrefetched:
+    def test_preserves_file_order(self, tmp_path):
+        files = []
+        for i in range(20):
+            f = tmp_path / f"s{i}.jsonl"
+            f.write_text(_bash_line(f"echo {i}") + "\n" + _bash_line(f"echo {i}b"))
+            files.append(f)
+        files.insert(5, tmp_path / "missing.jsonl")
+
+        commands = [r.command for r in iter_commands_prefetched(files, prefetch=4)]
+        assert commands == [c for i in range(20) for c in (f"echo {i}", f"echo {i}b")]
+
+    def test_empty(self):
+        assert list(iter_commands_prefetched([])) == []
+
+
+class TestSessionDiscovery:
+    def test_find_session_dirs(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("HOME", str(tmp_path))
+        projects = tmp_path / ".claude" / "projects"
+        (projects / "proj-a").mkdir(parents=True)
+        (projects / "proj-b").mkdir()
+        (projects / "stray.txt").write_text("")
+
+        found = sorted(p.name for p in find_session_dirs())
+        assert found == ["proj-a", "proj-b"]
+
+    def test_find_session_dirs_missing(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("HOME", str(tmp_path))
+        assert find_session_dirs() == []
+
+    def test_iter_session_files(self, tmp_path):
+        (tmp_path / "abc.jsonl").write_text("")
+        (tmp_path / "sessions-index.jsonl").write_text("")
+        (tmp_path / "notes.txt").write_text("")
+
+        assert [p.name for p in iter_session_files(tmp_path)] == ["abc.jsonl"]
+
+
+class TestAnalyzeHistory:
+    def test_merges_sessions(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("HOME", str(tmp_path))
+        project = tmp_path / ".claude" / "projects" / "proj"
+        project.mkdir(parents=True)
+        (project / "a.jsonl").write_text("\n".join([
+            _bash_line("git status"),
+            _bash_line("git diff && npm test"),
+        ]))
+        (project / "b.jsonl").write_text(_bash_line("git status"))
+
+        analysis = analyze_history()
+        assert analysis.total_commands == 3
+        assert analysis.unique_base_commands == {"git": 3, "npm": 1}
+        assert analysis.chained_commands == ["git diff && npm test"]
+
+        first = list_session_files(max_sessions=1)[0].name
+        expected = {"a.jsonl": 2, "b.jsonl": 1}[first]
+        assert analyze_history(max_sessions=1).total_commands == expected
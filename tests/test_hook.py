@@ -0,0 +1,59 @@
+"""Tests for the hook entry point and config loading."""
+
+import os
+
+import pytest
+
+from claude_permissions_pro.hook import Config, _load_config_and_matcher, run_hook
+
+
+def _write_config(path, mode="smart", allow=("git *",)):
+    rules = "".join(f'[[allow]]\npattern = "{p}"\n\n' for p in allow)
+    path.write_text(f'[settings]\nmode = "{mode}"\n\n{rules}')
+    return path
+
+
+class TestConfig:
+    def test_load(self, tmp_path):
+        config = Config.load(_write_config(tmp_path / "config.toml"))
+        assert config.mode == "smart"
+        assert config.allow_patterns == ["git *"]
+
+    def test_unknown_mode_rejected(self, tmp_path):
+        with pytest.raises(ValueError, match="unknown mode 'relaxed'"):
+            Config.load(_write_config(tmp_path / "config.toml", mode="relaxed"))
+
+
+class TestConfigCache:
+    def test_reused_until_file_changes(self, tmp_path):
+        path = _write_config(tmp_path / "config.toml")
+        config, matcher = _load_config_and_matcher(path)
+        again_config, again_matcher = _load_config_and_matcher(path)
+        assert again_config is config
+        assert again_matcher is matcher
+
+        _write_config(path, allow=("git *", "npm *"))
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        reloaded, rematched = _load_config_and_matcher(path)
+        assert rematched is not matcher
+        assert reloaded.allow_patterns == ["git *", "npm *"]
+
+    def test_same_mtime_different_size_reloads(self, tmp_path):
+        path = _write_config(tmp_path / "config.toml")
+        mtime_ns = path.stat().st_mtime_ns
+        _, matcher = _load_config_and_matcher(path)
+
+        _write_config(path, allow=("git *", "npm *"))
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+        config, rematched = _load_config_and_matcher(path)
+        assert rematched is not matcher
+        assert config.allow_patterns == ["git *", "npm *"]
+
+
+class TestRunHook:
+    def test_invalid_config_passes_through(self, tmp_path, capsys):
+        run_hook(_write_config(tmp_path / "config.toml", mode="relaxed"))
+        captured = capsys.readouterr()
+        assert captured.out == ""
+        assert "invalid config" in captured.err
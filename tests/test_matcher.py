@@ -1,11 +1,16 @@
 """Tests for pattern matching."""
 
+import re
+from pathlib import Path
+
 import pytest
+from claude_permissions_pro.hook import Config
 from claude_permissions_pro.matcher import (
     Matcher,
     Decision,
     Pattern,
 )
+from claude_permissions_pro.shell_parser import parse_command
 
 
 class TestPattern:
@@ -29,6 +34,16 @@ class TestPattern:
         assert p.matches("npm run build")
         assert not p.matches("npm publish")
 
+    def test_glob_compiled_on_first_use(self):
+        p = Pattern.from_string("npm *")
+        assert p._match is None
+        assert p.matches("npm install")
+        assert p._match is not None
+
+    def test_invalid_regex_rejected_at_load(self):
+        with pytest.raises(re.error):
+            Pattern.from_string("/npm (/")
+
     def test_glob_with_subcommand(self):
         p = Pattern.from_string("git commit *")
         assert p.matches("git commit -m 'message'")
@@ -123,6 +138,25 @@ class TestMatcher:
         result = matcher.check("npm install && unknown-cmd")
         assert result.decision == Decision.ASK
 
+    def test_chain_deny_after_unknown_smart_mode(self):
+        """Segments after the first unknown one are still checked for deny."""
+        matcher = Matcher(
+            allow_patterns=["npm *"],
+            deny_patterns=["rm *"],
+            mode="smart"
+        )
+        result = matcher.check("unknown-cmd && npm test && rm -rf /")
+        assert result.decision == Decision.DENY
+        assert result.matched_rule == "rm *"
+
+        result = matcher.check("unknown-cmd && npm test && other-cmd")
+        assert result.decision == Decision.ASK
+        assert result.reason == "Unknown segment: 'unknown-cmd'"
+
+    def test_invalid_mode_rejected(self):
+        with pytest.raises(ValueError, match="mode"):
+            Matcher(allow_patterns=["npm *"], mode="relaxed")
+
     def test_chain_with_deny_segment(self):
         """Deny the whole chain if any segment is denied."""
         matcher = Matcher(
@@ -267,3 +301,95 @@ class TestMatcher:
         assert matcher.check("npm test").decision == Decision.ALLOW
         assert matcher.check("npm run build").decision == Decision.ALLOW
         assert matcher.check("npm publish").decision == Decision.ASK
+
+    def test_first_matching_rule_in_config_order(self):
+        """Wildcard and per-command rules are reported in config order."""
+        matcher = Matcher(allow_patterns=["*install*", "npm *", "git *"])
+        assert matcher.check("npm install").matched_rule == "*install*"
+        assert matcher.check("npm test").matched_rule == "npm *"
+
+        matcher = Matcher(allow_patterns=["npm *", "/install/"])
+        assert matcher.check("npm install").matched_rule == "npm *"
+        assert matcher.check("pip install x").matched_rule == "/install/"
+
+    def test_wildcard_in_first_word(self):
+        matcher = Matcher(allow_patterns=["n?m *", "npm*"])
+        assert matcher.check("nvm use 20").matched_rule == "n?m *"
+        assert matcher.check("npmx foo").matched_rule == "npm*"
+
+    def test_multi_word_prefixes(self):
+        """Rules keyed by several leading words are still tried in config order."""
+        matcher = Matcher(
+            allow_patterns=["git commit *", "git com*", "git *"],
+            deny_patterns=["git push --force *"],
+        )
+        assert matcher.check("git commit -m x").matched_rule == "git commit *"
+        assert matcher.check("git commit").matched_rule == "git commit *"
+        assert matcher.check("git commitx").matched_rule == "git com*"
+        assert matcher.check("git status").matched_rule == "git *"
+        assert matcher.check("git push --force origin").decision == Decision.DENY
+        assert matcher.check("git push origin").decision == Decision.ALLOW
+
+    def test_combined_globs_keep_config_order(self):
+        """Runs of globs matched as one regex still report the first matching rule."""
+        matcher = Matcher(allow_patterns=["npm *", "npm install*", "/^npm/", "np? *", "*"])
+        assert matcher.check("npm install").matched_rule == "npm *"
+        assert matcher.check("npm").matched_rule == "npm *"
+        assert matcher.check("npx foo").matched_rule == "np? *"
+        assert matcher.check("yarn").matched_rule == "*"
+
+    def test_repeated_chain_segments_checked_once(self):
+        matcher = Matcher(allow_patterns=["cd *", "echo *"])
+        assert matcher.check("cd a && echo x && cd a").decision == Decision.ALLOW
+        assert matcher.check("cd a; echo x").decision == Decision.ALLOW
+        assert matcher._check_segment.cache_info().hits == 3
+
+    def test_bundled_config_builds_alternations_lazily(self):
+        """Constructing a matcher compiles no combined regexes; lookups build only what they reach."""
+        Matcher.clear_caches()  # Patterns are shared with earlier tests
+        config = Config.load(Path(__file__).parent.parent / "config.toml")
+        matcher = Matcher(config.allow_patterns, config.deny_patterns, config.mode)
+
+        def nodes(trie):
+            stack = [trie._root]
+            while stack:
+                node = stack.pop()
+                yield node
+                stack.extend(node.children.values())
+
+        all_nodes = [*nodes(matcher._allow_trie), *nodes(matcher._deny_trie)]
+        assert len(all_nodes) > 10
+        assert all(node.matching is None for node in all_nodes)
+        assert all(
+            rule.patterns[0]._match is None
+            for node in all_nodes for _, rule in node.rules
+            if not rule.patterns[0].is_regex
+        )
+
+        matcher.check("git status && npm test")
+        built = sum(node.matching is not None for node in all_nodes)
+        assert 0 < built <= 6
+
+    def test_normalized_first_word(self):
+        """Rules are found by the command's first word after normalization."""
+        matcher = Matcher(allow_patterns=["python *"], deny_patterns=["rm *"])
+        assert matcher.check(".venv/bin/python foo.py").decision == Decision.ALLOW
+        assert matcher.check("FOO=1 sudo rm x").decision == Decision.DENY
+
+    def test_patterns_shared_between_matchers(self):
+        a = Matcher(allow_patterns=["npm *"])
+        b = Matcher(allow_patterns=["npm *"])
+        assert a.allow_rules[0].patterns[0] is b.allow_rules[0].patterns[0]
+
+        Matcher.clear_caches()
+        c = Matcher(allow_patterns=["npm *"])
+        assert c.allow_rules[0].patterns[0] is not a.allow_rules[0].patterns[0]
+        assert c.check("npm test").decision == Decision.ALLOW
+
+    def test_clear_caches(self):
+        matcher = Matcher(allow_patterns=["npm *"])
+        assert matcher.check("npm install && npm test").decision == Decision.ALLOW
+
+        Matcher.clear_caches()
+        assert parse_command.cache_info().currsize == 0
+        assert matcher.check("npm install && npm test").decision == Decision.ALLOW
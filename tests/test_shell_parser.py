@@ -200,6 +200,14 @@ class TestParseCommand:
         assert result.segments[0].command == "source .venv/bin/activate"
         assert "import sys" in result.segments[1].command
 
+    def test_repeated_parse_is_cached(self):
+        """Parsing the same command twice returns the same immutable result."""
+        first = parse_command("npm install && npm test")
+        assert parse_command("npm install && npm test") is first
+        assert isinstance(first.segments, tuple)
+        with pytest.raises(AttributeError):
+            first.segments[0].command = "rm -rf /"
+
     def test_complex_chain(self):
         """Complex real-world chain."""
         result = parse_command("git add . && git commit -m 'update' && git push")